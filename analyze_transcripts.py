@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+ניתוח סטטיסטי של ארכיון תמלולים
+שימוש: python analyze_transcripts.py batch_output output --workers 4
+"""
+
+import os
+import re
+import sys
+import json
+import glob
+import argparse
+from collections import Counter
+from datetime import datetime
+from multiprocessing import Pool
+
+import numpy as np
+from tqdm import tqdm
+
+WORD_RE = re.compile(r"\w+")
+
+# פלח נחשב "בביטחון נמוך" מתחת לסף הזה (כמו ב-Whisper עצמו)
+LOW_CONFIDENCE = 0.5
+LOGPROB_THRESHOLD = -1.0
+
+# הפסקה ארוכה מזו נחשבת החלפת דובר (כמו ב-extract_speakers)
+SPEAKER_GAP = 3.0
+
+class TranscriptStats:
+    """צובר סטטיסטיקה על תמלולים - ניתן למזג בין תהליכים"""
+
+    def __init__(self):
+        self.files = 0
+        self.segments = 0
+        self.low_confidence = 0
+        self.low_confidence_time = 0.0
+        self.speech_time = 0.0
+        self.word_freq = Counter()
+        # מדד אחד לכל קובץ (או לכל דובר בקובץ) - נשמר כמערך NumPy לחישוב התפלגויות.
+        # דובר 1 בקובץ אחד אינו דובר 1 בקובץ אחר, ולכן אין סכום לפי מספר דובר
+        self._durations = []
+        self._words = []
+        self._speakers = []
+        self._speaker_times = []
+        self._dominant_shares = []
+        self.file_durations = np.zeros(0)
+        self.file_words = np.zeros(0, dtype=np.int64)
+        self.file_speakers = np.zeros(0, dtype=np.int64)
+        self.speaker_times = np.zeros(0)
+        self.dominant_shares = np.zeros(0)
+
+    def add_file(self, path):
+        """הוסף קובץ JSON שמור; קבצים שאינם תמלול (כמו summary.json) מדולגים"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or "segments" not in data:
+            return False
+        self.add_result(data)
+        return True
+
+    def add_result(self, result):
+        """הוסף תוצאת תמלול בודדת"""
+        segments = result["segments"]
+        count = len(segments)
+
+        # עמודות הפלחים כמערכים - בלי לשמור את המילונים עצמם
+        starts = np.fromiter((s["start"] for s in segments), float, count)
+        ends = np.fromiter((s["end"] for s in segments), float, count)
+        durations = np.clip(ends - starts, 0, None)
+        words = np.fromiter(
+            (self._count_words(s["text"]) for s in segments), np.int64, count
+        )
+        low = np.fromiter((self._is_low_confidence(s) for s in segments), bool, count)
+
+        # דוברים: דובר חדש אחרי כל הפסקה ארוכה
+        speakers = np.zeros(count, dtype=np.int64)
+        if count > 1:
+            speakers[1:] = np.cumsum(starts[1:] - ends[:-1] > SPEAKER_GAP)
+        speaker_time = np.bincount(speakers, weights=durations)
+
+        self.files += 1
+        self.segments += count
+        self.low_confidence += int(low.sum())
+        self.low_confidence_time += float(durations[low].sum())
+        self.speech_time += float(durations.sum())
+        # המשך האמיתי נשמר ב-JSON של batch_transcribe; אחרת - סוף הפלח האחרון
+        duration = result.get("duration") or (float(ends[-1]) if count else 0.0)
+        self._durations.append(float(duration))
+        self._words.append(int(words.sum()))
+        self._speakers.append(len(speaker_time))
+        self._speaker_times.extend(speaker_time.tolist())
+        if speaker_time.sum() > 0:
+            self._dominant_shares.append(float(speaker_time.max() / speaker_time.sum()))
+
+    def _count_words(self, text):
+        """ספור מילים בפלח ועדכן את שכיחויות המילים"""
+        tokens = WORD_RE.findall(text)
+        self.word_freq.update(tokens)
+        return len(tokens)
+
+    def _is_low_confidence(self, segment):
+        """ביטחון נמוך - לפי confidence אם חושב, אחרת לפי avg_logprob של Whisper"""
+        if "confidence" in segment:
+            return segment["confidence"] < LOW_CONFIDENCE
+        return segment.get("avg_logprob", 0.0) < LOGPROB_THRESHOLD
+
+    def _flush(self):
+        """העבר את המדדים לכל קובץ מרשימות למערכי NumPy"""
+        if self._durations:
+            self.file_durations = np.concatenate([self.file_durations, self._durations])
+            self.file_words = np.concatenate([self.file_words, self._words])
+            self.file_speakers = np.concatenate([self.file_speakers, self._speakers])
+            self._durations, self._words, self._speakers = [], [], []
+        if self._speaker_times:
+            self.speaker_times = np.concatenate([self.speaker_times, self._speaker_times])
+            self._speaker_times = []
+        if self._dominant_shares:
+            self.dominant_shares = np.concatenate([self.dominant_shares, self._dominant_shares])
+            self._dominant_shares = []
+
+    def merge(self, other):
+        """מזג תוצאה חלקית (למשל מתהליך אחר) לתוך הצובר הזה"""
+        self._flush()
+        other._flush()
+        self.files += other.files
+        self.segments += other.segments
+        self.low_confidence += other.low_confidence
+        self.low_confidence_time += other.low_confidence_time
+        self.speech_time += other.speech_time
+        self.word_freq.update(other.word_freq)
+        self.file_durations = np.concatenate([self.file_durations, other.file_durations])
+        self.file_words = np.concatenate([self.file_words, other.file_words])
+        self.file_speakers = np.concatenate([self.file_speakers, other.file_speakers])
+        self.speaker_times = np.concatenate([self.speaker_times, other.speaker_times])
+        self.dominant_shares = np.concatenate([self.dominant_shares, other.dominant_shares])
+        return self
+
+    def __getstate__(self):
+        self._flush()
+        return self.__dict__
+
+    def report(self, top=20):
+        """צור דוח מסכם על כל הארכיון"""
+        self._flush()
+        total_duration = float(self.file_durations.sum())
+        total_words = int(self.file_words.sum())
+
+        # מילים לדקה לכל קובץ (רק קבצים עם משך)
+        has_duration = self.file_durations > 0
+        wpm = self.file_words[has_duration] / (self.file_durations[has_duration] / 60)
+
+        def percentiles(values, digits=1):
+            if not len(values):
+                return {"mean": 0, "median": 0, "p90": 0}
+            return {
+                "mean": round(float(values.mean()), digits),
+                "median": round(float(np.median(values)), digits),
+                "p90": round(float(np.percentile(values, 90)), digits),
+            }
+
+        return {
+            "date": datetime.now().isoformat(),
+            "total_files": self.files,
+            "total_segments": self.segments,
+            "total_duration": round(total_duration, 1),
+            "speech_time": round(self.speech_time, 1),
+            "total_words": total_words,
+            "unique_words": len(self.word_freq),
+            "words_per_minute": round(total_words / (total_duration / 60), 1) if total_duration else 0,
+            "words_per_minute_per_file": percentiles(wpm),
+            "low_confidence_rate": round(self.low_confidence / self.segments, 4) if self.segments else 0,
+            "low_confidence_time_rate": round(self.low_confidence_time / self.speech_time, 4) if self.speech_time else 0,
+            "speakers_per_file": percentiles(self.file_speakers),
+            "speaker_time": percentiles(self.speaker_times),
+            "dominant_speaker_share": percentiles(self.dominant_shares, digits=3),
+            "most_common_words": self.word_freq.most_common(top),
+        }
+
+def analyze_chunk(paths):
+    """נתח קבוצת קבצים בתהליך נפרד והחזר תוצאה חלקית"""
+    stats = TranscriptStats()
+    errors = []
+    for path in paths:
+        try:
+            stats.add_file(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            errors.append((path, str(e)))
+    return stats, errors, len(paths)
+
+def collect_files(inputs):
+    """אסוף קבצי JSON מתיקיות, תבניות וקבצים בודדים"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(glob.glob(os.path.join(item, "**", "*.json"), recursive=True))
+        elif '*' in item or '?' in item:
+            files.extend(glob.glob(item, recursive=True))
+        elif os.path.exists(item):
+            files.append(item)
+    return sorted(set(files))
+
+def main():
+    parser = argparse.ArgumentParser(description='ניתוח סטטיסטי של ארכיון תמלולים')
+    parser.add_argument('inputs', nargs='+', help='תיקיות או קבצי JSON של תמלולים')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='מספר תהליכים במקביל (ברירת מחדל: מספר המעבדים)')
+    parser.add_argument('--chunk-size', type=int, default=64,
+                       help='קבצים לכל משימה בתהליך (ברירת מחדל: 64)')
+    parser.add_argument('--top', type=int, default=20,
+                       help='מספר המילים הנפוצות בדוח (ברירת מחדל: 20)')
+    parser.add_argument('--output', default='analytics.json',
+                       help='קובץ הדוח (ברירת מחדל: analytics.json)')
+
+    args = parser.parse_args()
+
+    files = collect_files(args.inputs)
+    if not files:
+        print("❌ לא נמצאו קבצי תמלול")
+        sys.exit(1)
+
+    print(f"📁 נמצאו {len(files)} קבצי JSON")
+
+    chunk_size = max(1, args.chunk_size)
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+
+    # כל תהליך מחזיר תוצאה חלקית שממוזגת מיד - בלי להחזיק את כל הקבצים בזיכרון
+    total = TranscriptStats()
+    errors = []
+    with tqdm(total=len(files), desc="ניתוח", unit="קובץ") as pbar:
+        if args.workers > 1 and len(chunks) > 1:
+            with Pool(processes=args.workers) as pool:
+                for stats, chunk_errors, done in pool.imap_unordered(analyze_chunk, chunks):
+                    total.merge(stats)
+                    errors.extend(chunk_errors)
+                    pbar.update(done)
+        else:
+            for chunk in chunks:
+                stats, chunk_errors, done = analyze_chunk(chunk)
+                total.merge(stats)
+                errors.extend(chunk_errors)
+                pbar.update(done)
+
+    report = total.report(top=args.top)
+    report["errors"] = [{"file": f, "error": e} for f, e in errors]
+
+    # סיכום
+    print("\n" + "="*50)
+    print("📊 ניתוח הארכיון:")
+    print("="*50)
+    print(f"  • תמלולים: {report['total_files']}")
+    print(f"  • משך כולל: {report['total_duration'] / 3600:.1f} שעות")
+    print(f"  • מילים: {report['total_words']} ({report['unique_words']} שונות)")
+    print(f"  • מילים לדקה: {report['words_per_minute']}")
+    print(f"  • פלחים בביטחון נמוך: {report['low_confidence_rate']:.1%}")
+    print(f"  • דוברים לקובץ (חציון): {report['speakers_per_file']['median']}")
+
+    print(f"\n📈 מילים נפוצות:")
+    for word, count in report['most_common_words'][:10]:
+        print(f"  • {word}: {count} פעמים")
+
+    if errors:
+        print(f"\n🔴 {len(errors)} קבצים לא נקראו")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📄 הדוח נשמר ל: {args.output}")
+
+if __name__ == "__main__":
+    main()
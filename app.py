@@ -3,22 +3,96 @@ import gradio as gr
 import os
 from datetime import datetime
 import json
+import time
+import math
+import queue
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from hebrew_postprocess import postprocess_result, subtitle_cues
 
 # הגדרות
 MODEL_SIZE = os.environ.get("WHISPER_MODEL", "base")
+WORKERS = int(os.environ.get("WHISPER_WORKERS", 1))
+QUEUE_SIZE = int(os.environ.get("QUEUE_SIZE", 16))
+CACHE_SIZE = 32
 OUTPUT_DIR = "output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# טען מודל
-print(f"🔄 טוען מודל Whisper {MODEL_SIZE}...")
-model = whisper.load_model(MODEL_SIZE)
+# טען מודל - עותק אחד לכל עובד, כדי שתמלולים מקבילים לא יתחרו על אותו מודל
+print(f"🔄 טוען מודל Whisper {MODEL_SIZE} ({WORKERS} עובדים)...")
+models = queue.Queue()
+for _ in range(WORKERS):
+    models.put(whisper.load_model(MODEL_SIZE))
 print("✅ המודל מוכן!")
 
-def transcribe_audio(audio_file, options):
-    """תמלל קובץ אודיו עם אפשרויות מתקדמות"""
-    if not audio_file:
-        return "❌ אנא העלה קובץ", "", ""
-    
+# מאגר עובדים ומעקב אחרי עבודות
+executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="whisper")
+jobs = OrderedDict()   # מפתח העלאה -> Future (בתהליך או גמור)
+pending = []           # מפתחות שממתינים לעובד, לפי סדר
+running = {}           # מפתח -> זמן התחלה
+job_times = deque(maxlen=20)
+jobs_lock = threading.Lock()
+
+def upload_key(audio_file, options):
+    """מפתח ייחודי להעלאה לפי תוכן הקובץ והאפשרויות"""
+    digest = hashlib.sha256()
+    with open(audio_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    digest.update("|".join(sorted(options)).encode("utf-8"))
+    return digest.hexdigest()
+
+def submit_job(key, audio_file, options):
+    """הגש עבודה לתור, או החזר עבודה קיימת עם אותו מפתח"""
+    with jobs_lock:
+        future = jobs.get(key)
+        if future is not None:
+            jobs.move_to_end(key)
+            return future, True
+        
+        pending.append(key)
+        future = executor.submit(run_transcription, key, audio_file, options)
+        jobs[key] = future
+        
+        # שמור רק את התוצאות האחרונות שכבר הסתיימו
+        while len(jobs) > CACHE_SIZE:
+            oldest_key, oldest = next(iter(jobs.items()))
+            if not oldest.done():
+                break
+            del jobs[oldest_key]
+        return future, False
+
+def forget_job(key, future):
+    """הסר עבודה שנכשלה, כדי שלחיצה חוזרת תנסה שוב"""
+    with jobs_lock:
+        if jobs.get(key) is future:
+            del jobs[key]
+
+def queue_status(key):
+    """טקסט סטטוס עם מקום בתור וזמן משוער"""
+    with jobs_lock:
+        average = sum(job_times) / len(job_times) if job_times else None
+        if key in running:
+            if average is None:
+                return "🎙️ מתמלל..."
+            remaining = max(0, average - (time.time() - running[key]))
+            return f"🎙️ מתמלל... (זמן משוער: ~{remaining:.0f} שניות)"
+        if key in pending:
+            position = pending.index(key) + 1
+            if average is None:
+                return f"⏳ ממתין בתור: מקום {position}"
+            eta = (math.ceil(position / WORKERS) + 0.5) * average
+            return f"⏳ ממתין בתור: מקום {position} (זמן משוער: ~{eta:.0f} שניות)"
+    return "⏳ ממתין..."
+
+def run_transcription(key, audio_file, options):
+    """תמלל קובץ אודיו על אחד העובדים ושמור את הקבצים"""
+    with jobs_lock:
+        pending.remove(key)
+        running[key] = time.time()
+    model = models.get()
     try:
         # הגדרות תמלול
         task = "translate" if "תרגום לאנגלית" in options else "transcribe"
@@ -32,6 +106,10 @@ def transcribe_audio(audio_file, options):
             verbose=True
         )
         
+        # ניקוי טקסט עברי - פעם אחת לפני כל הכותבים והתצוגה המקדימה
+        if "ניקוי טקסט" in options:
+            result = postprocess_result(result)
+        
         # שמור קבצים
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         base_name = os.path.splitext(os.path.basename(audio_file))[0]
@@ -50,22 +128,54 @@ def transcribe_audio(audio_file, options):
         with open(json_path, "w", encoding="utf-8") as f:
             json.dump(result, f, ensure_ascii=False, indent=2)
         
+        with jobs_lock:
+            job_times.append(time.time() - running[key])
+        
         return (
             result["text"],
             f"✅ הקבצים נשמרו ב-{OUTPUT_DIR}/",
             create_preview(result["segments"])
         )
+    finally:
+        models.put(model)
+        with jobs_lock:
+            running.pop(key, None)
+
+def transcribe_audio(audio_file, options):
+    """תמלל קובץ אודיו עם אפשרויות מתקדמות"""
+    if not audio_file:
+        yield "❌ אנא העלה קובץ", "", ""
+        return
+    
+    key = future = None
+    try:
+        key = upload_key(audio_file, options)
+        future, reused = submit_job(key, audio_file, options)
+        # "תוצאה קיימת" רק אם העבודה כבר הסתיימה כשלחצו, לא כשהצטרפנו לעבודה בתהליך
+        cached = reused and future.done()
+        
+        # הצג מקום בתור עד שהעבודה מסתיימת
+        while not future.done():
+            yield "", queue_status(key), ""
+            wait([future], timeout=1)
+        
+        text, status, preview = future.result()
+        if cached:
+            status = f"♻️ תוצאה קיימת - {status}"
+        yield text, status, preview
         
     except Exception as e:
-        return f"❌ שגיאה: {str(e)}", "", ""
+        if future is not None:
+            forget_job(key, future)
+        yield f"❌ שגיאה: {str(e)}", "", ""
 
 def create_srt(segments, output_path):
     """צור קובץ כתוביות SRT"""
     with open(output_path, "w", encoding="utf-8") as f:
-        for i, seg in enumerate(segments, 1):
-            start = format_timestamp(seg["start"])
-            end = format_timestamp(seg["end"])
-            f.write(f"{i}\n{start} --> {end}\n{seg['text'].strip()}\n\n")
+        for i, (start, end, text) in enumerate(subtitle_cues(segments), 1):
+            start = format_timestamp(start)
+            end = format_timestamp(end)
+            f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
 
 def format_timestamp(seconds):
     """המר שניות לפורמט SRT"""
@@ -108,9 +218,10 @@ with gr.Blocks(title="תמלול Whisper", theme=gr.themes.Soft()) as app:
                 choices=[
                     "עברית",
                     "תרגום לאנגלית",
-                    "הוסף חותמות זמן"
+                    "הוסף חותמות זמן",
+                    "ניקוי טקסט"
                 ],
-                value=["עברית"],
+                value=["עברית", "ניקוי טקסט"],
                 label="⚙️ אפשרויות"
             )
             
@@ -142,14 +253,15 @@ with gr.Blocks(title="תמלול Whisper", theme=gr.themes.Soft()) as app:
     transcribe_btn.click(
         fn=transcribe_audio,
         inputs=[audio_input, options],
-        outputs=[output_text, status, preview]
+        outputs=[output_text, status, preview],
+        concurrency_limit=QUEUE_SIZE
     )
     
     # הוראות נוספות
     gr.Markdown("""
     ---
     ### 💡 טיפים:
-    - **מודל נוכחי:** {model}
+    - **מודל נוכחי:** {model} ({workers} עובדים)
     - **גודל מקסימלי:** 25MB ב-Codespaces
     - **פורמטים נתמכים:** MP3, WAV, MP4, M4A ועוד
     
@@ -157,10 +269,12 @@ with gr.Blocks(title="תמלול Whisper", theme=gr.themes.Soft()) as app:
     - `.txt` - טקסט נקי
     - `.srt` - כתוביות לוידאו  
     - `.json` - מידע מלא כולל זמנים
-    """.format(model=MODEL_SIZE))
+    """.format(model=MODEL_SIZE, workers=WORKERS))
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 7860))
+    # הבקשות עצמן רק ממתינות לתוצאה; התמלול בפועל מוגבל למאגר העובדים
+    app.queue(max_size=QUEUE_SIZE * 2)
     app.launch(
         server_name="0.0.0.0",
         server_port=port,
@@ -13,48 +13,156 @@ from pathlib import Path
 from datetime import datetime
 import json
 from tqdm import tqdm
-import concurrent.futures
+import queue
+import threading
+from hebrew_postprocess import postprocess_result, subtitle_cues
 
-def transcribe_file(file_path, model, output_dir):
-    """תמלל קובץ בודד"""
-    try:
-        print(f"\n🎙️ מתמלל: {os.path.basename(file_path)}")
-        
-        # תמלל
-        result = model.transcribe(file_path, language="he")
-        
-        # צור שמות קבצים
-        base_name = Path(file_path).stem
-        txt_path = os.path.join(output_dir, f"{base_name}.txt")
-        srt_path = os.path.join(output_dir, f"{base_name}.srt")
-        json_path = os.path.join(output_dir, f"{base_name}.json")
-        
-        # שמור טקסט
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(result["text"])
-        
-        # שמור SRT
-        with open(srt_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(result["segments"], 1):
-                start = format_time(segment["start"])
-                end = format_time(segment["end"])
-                f.write(f"{i}\n{start} --> {end}\n{segment['text'].strip()}\n\n")
-        
-        # שמור JSON
-        metadata = {
-            "file": file_path,
-            "date": datetime.now().isoformat(),
-            "duration": result.get("duration", 0),
-            "text": result["text"],
-            "segments": result["segments"]
-        }
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
-        
-        return True, file_path, None
-        
-    except Exception as e:
-        return False, file_path, str(e)
+# סמן סיום בין שלבי הצינור
+_DONE = None
+
+# מספר מקסימלי של תהליכוני פענוח - ffmpeg מהיר מהמודל, אבל בקבצים קצרים
+# או עם כמה עובדים פענוח סדרתי יחיד הופך לצוואר בקבוק
+MAX_DECODERS = 2
+
+def decode_stage(file_queue, audio_queue):
+    """שלב 1: פענוח אודיו (ffmpeg) לפני שהמודל פנוי"""
+    while True:
+        try:
+            file_path = file_queue.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            audio = whisper.load_audio(file_path)
+            audio_queue.put((file_path, audio, None))
+        except Exception as e:
+            audio_queue.put((file_path, None, str(e)))
+        audio = None
+
+def finish_decode(decoders, audio_queue, num_workers):
+    """סמן לעובדי התמלול שהפענוח הסתיים, אחרי שכל המפענחים סיימו"""
+    for thread in decoders:
+        thread.join()
+    for _ in range(num_workers):
+        audio_queue.put(_DONE)
+
+def inference_stage(model, audio_queue, result_queue):
+    """שלב 2: תמלול - עובד אחד לכל תמלול מקבילי"""
+    while True:
+        item = audio_queue.get()
+        if item is _DONE:
+            result_queue.put(_DONE)
+            return
+        file_path, audio, error = item
+        if error is not None:
+            result_queue.put((file_path, None, error))
+            continue
+        try:
+            print(f"\n🎙️ מתמלל: {os.path.basename(file_path)}")
+            result = model.transcribe(audio, language="he")
+            result["duration"] = len(audio) / whisper.audio.SAMPLE_RATE
+            result_queue.put((file_path, result, None))
+        except Exception as e:
+            result_queue.put((file_path, None, str(e)))
+        # שחרר את האודיו והתוצאה מיד - אין צורך בהם יותר
+        audio = item = result = None
+
+def write_stage(result_queue, output_dir, cleanup, num_workers, on_done, failures):
+    """שלבים 3-4: ניקוי טקסט וכתיבה לדיסק, בתהליכון I/O נפרד
+    
+    הכותב ממשיך לרוקן את התור גם אחרי שגיאה, אחרת עובדי התמלול ייתקעו
+    על תור מלא. שגיאות לא צפויות נאספות ל-failures ונזרקות מחדש בסוף.
+    """
+    remaining = num_workers
+    while remaining:
+        item = result_queue.get()
+        if item is _DONE:
+            remaining -= 1
+            continue
+        result = None
+        try:
+            file_path, result, error = item
+            if error is None:
+                try:
+                    if cleanup:
+                        result = postprocess_result(result)
+                    write_outputs(file_path, result, output_dir)
+                except Exception as e:
+                    error = str(e)
+            on_done(file_path, error)
+        except Exception as e:
+            failures.append(e)
+        # שחרר את התוצאה ברגע שנכתבה
+        item = result = None
+
+def write_outputs(file_path, result, output_dir):
+    """שמור תוצאת תמלול כ-TXT, SRT ו-JSON"""
+    # צור שמות קבצים
+    base_name = Path(file_path).stem
+    txt_path = os.path.join(output_dir, f"{base_name}.txt")
+    srt_path = os.path.join(output_dir, f"{base_name}.srt")
+    json_path = os.path.join(output_dir, f"{base_name}.json")
+    
+    # שמור טקסט
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write(result["text"])
+    
+    # שמור SRT
+    with open(srt_path, "w", encoding="utf-8") as f:
+        for i, (start, end, text) in enumerate(subtitle_cues(result["segments"]), 1):
+            start = format_time(start)
+            end = format_time(end)
+            f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
+    
+    # שמור JSON
+    metadata = {
+        "file": file_path,
+        "date": datetime.now().isoformat(),
+        "duration": result.get("duration", 0),
+        "text": result["text"],
+        "segments": result["segments"]
+    }
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+def run_pipeline(files, models, output_dir, queue_size=2, cleanup=True, on_done=None):
+    """הרץ צינור פענוח → תמלול → ניקוי → כתיבה עם תורים חסומים בין השלבים
+    
+    עובד תמלול אחד לכל מודל ב-models - Whisper שומר מטמון פענוח על המודל,
+    ולכן שני תמלולים במקביל על אותו עותק מפריעים זה לזה.
+    התורים החסומים יוצרים לחץ-חוזר: הפענוח לא רץ רחוק מדי קדימה והכתיבה
+    לא עוצרת את התמלול, כך שהזיכרון נשאר קבוע גם באלפי קבצים.
+    """
+    num_workers = len(models)
+    file_queue = queue.Queue()
+    for file_path in files:
+        file_queue.put(file_path)
+    audio_queue = queue.Queue(maxsize=max(1, queue_size) * num_workers)
+    result_queue = queue.Queue(maxsize=max(1, queue_size) * num_workers)
+    failures = []
+    
+    decoders = [threading.Thread(target=decode_stage,
+                                 args=(file_queue, audio_queue),
+                                 name=f"decode-{i}", daemon=True)
+                for i in range(min(num_workers, MAX_DECODERS))]
+    threads = decoders + [threading.Thread(target=finish_decode,
+                                           args=(decoders, audio_queue, num_workers),
+                                           name="decode-done", daemon=True)]
+    threads += [threading.Thread(target=inference_stage,
+                                 args=(model, audio_queue, result_queue),
+                                 name=f"inference-{i}", daemon=True)
+                for i, model in enumerate(models)]
+    threads.append(threading.Thread(target=write_stage,
+                                    args=(result_queue, output_dir, cleanup, num_workers,
+                                          on_done or (lambda f, e: None), failures),
+                                    name="write", daemon=True))
+    
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    if failures:
+        raise failures[0]
 
 def format_time(seconds):
     """המר שניות לפורמט SRT"""
@@ -72,7 +180,11 @@ def main():
     parser.add_argument('--output', default='batch_output', 
                        help='תיקיית פלט')
     parser.add_argument('--parallel', type=int, default=1,
-                       help='מספר תמלולים במקביל (ברירת מחדל: 1)')
+                       help='מספר תמלולים במקביל - כל אחד טוען עותק מודל משלו (ברירת מחדל: 1)')
+    parser.add_argument('--queue-size', type=int, default=2,
+                       help='קבצים בהמתנה לכל עובד בין שלבי הצינור (ברירת מחדל: 2)')
+    parser.add_argument('--no-cleanup', action='store_true',
+                       help='דלג על ניקוי הטקסט העברי (פיסוק, מספרים, הזיות)')
     
     args = parser.parse_args()
     
@@ -99,7 +211,8 @@ def main():
     
     # טען מודל
     print(f"\n🔄 טוען מודל {args.model}...")
-    model = whisper.load_model(args.model)
+    # עותק מודל לכל תמלול מקבילי
+    models = [whisper.load_model(args.model) for _ in range(max(1, args.parallel))]
     
     # התחל תמלול
     print(f"\n🚀 מתחיל תמלול של {len(valid_files)} קבצים...")
@@ -109,30 +222,17 @@ def main():
     
     # תמלול עם progress bar
     with tqdm(total=len(valid_files), desc="תמלול", unit="קובץ") as pbar:
-        if args.parallel > 1:
-            # תמלול מקבילי
-            with concurrent.futures.ThreadPoolExecutor(max_workers=args.parallel) as executor:
-                futures = []
-                for file_path in valid_files:
-                    future = executor.submit(transcribe_file, file_path, model, args.output)
-                    futures.append(future)
-                
-                for future in concurrent.futures.as_completed(futures):
-                    success, file_path, error = future.result()
-                    if success:
-                        results.append(file_path)
-                    else:
-                        failed.append((file_path, error))
-                    pbar.update(1)
-        else:
-            # תמלול סדרתי
-            for file_path in valid_files:
-                success, file_path, error = transcribe_file(file_path, model, args.output)
-                if success:
-                    results.append(file_path)
-                else:
-                    failed.append((file_path, error))
-                pbar.update(1)
+        def on_done(file_path, error):
+            if error is None:
+                results.append(file_path)
+            else:
+                failed.append((file_path, error))
+            pbar.update(1)
+        
+        run_pipeline(valid_files, models, args.output,
+                     queue_size=args.queue_size,
+                     cleanup=not args.no_cleanup,
+                     on_done=on_done)
     
     # סיכום
     print("\n" + "="*50)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+עיבוד-המשך לתמלולים בעברית
+ניקוי טקסט, נרמול מספרים, פיסוק, הסרת "הזיות" חוזרות ושבירת שורות לכתוביות RTL
+
+שימוש:
+    from hebrew_postprocess import postprocess_result, subtitle_cues
+    result = postprocess_result(model.transcribe(...))
+"""
+
+import re
+from functools import lru_cache
+
+# הגדרות כתוביות
+MAX_LINE_CHARS = 42
+MAX_LINES = 2
+
+# סימני כיווניות
+RLM = "‏"
+
+# ביטויים ש-Whisper "מזייף" בעברית - בעיקר בקטעי שקט ובסוף הקלטה
+HALLUCINATION_PHRASES = [
+    "תודה רבה שצפיתם",
+    "תודה שצפיתם",
+    "תודה על הצפייה",
+    "תודה רבה על הצפייה",
+    "אל תשכחו להירשם לערוץ",
+    "הירשמו לערוץ",
+    "תודה שהאזנתם",
+    "כתוביות על ידי",
+    "תרגום על ידי",
+    "תורגם על ידי",
+    "תמלול על ידי",
+    "עברית על ידי",
+    "נתראה בסרטון הבא",
+    "Thanks for watching",
+    "Subtitles by",
+]
+
+# פלח שאחריו הפסקה ארוכה מזו (בשניות) נחשב סוף משפט
+SENTENCE_GAP = 1.5
+
+# פלח זהה לקודמו נחשב "לולאת הזיה" רק אם ההפסקה ביניהם קצרה מזו
+REPEAT_GAP = 1.0
+
+# מילים שהופכות ל-% כשהן באות אחרי ספרות
+_PERCENT_WORDS = ("אחוזים", "אחוז")
+
+
+def _trie_regex(phrases):
+    """בנה ביטוי רגולרי דחוס מעץ תחיליות (trie) של ביטויים"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        if "" in node and len(node) == 1:
+            return ""
+        alternatives = []
+        optional = False
+        for char in sorted(node):
+            if char == "":
+                optional = True
+                continue
+            alternatives.append(re.escape(char) + build(node[char]))
+        if len(alternatives) == 1:
+            pattern = alternatives[0]
+            if optional:
+                pattern = f"(?:{pattern})?"
+        else:
+            pattern = "(?:" + "|".join(alternatives) + ")"
+            if optional:
+                pattern += "?"
+        return pattern
+
+    return build(trie)
+
+
+# ביטויים רגולריים מקומפלים מראש
+_HALLUCINATION_RE = re.compile(
+    r"^[\s\W]*(?:" + _trie_regex(HALLUCINATION_PHRASES) + r")[\s\W]*$",
+    re.IGNORECASE,
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([.,!?;:%])")
+# רק לפני אות עברית - כך כתובות ומזהים כמו "example.com?q=1" לא נפגעים
+_MISSING_SPACE_AFTER_PUNCT_RE = re.compile(r"([,!?;…])(?=[א-ת])")
+_REPEATED_PUNCT_RE = re.compile(r"([,!?;:])\1+")
+_ELLIPSIS_RE = re.compile(r"\.{2,}")
+# מילה בודדת - רק רצף ארוך (6 ומעלה), כדי לא לפגוע ב"לא לא לא" או "כן כן כן כן"
+_REPEATED_WORD_RE = re.compile(r"\b(\w+)\b(?:[\s,]+\1\b){5,}")
+# ביטוי של 2-6 מילים שחוזר 3 פעמים ומעלה
+_REPEATED_PHRASE_RE = re.compile(r"\b(\w+(?:\s+\w+){1,5}?)\b(?:[\s,]+\1\b){2,}")
+_DIGIT_RE = re.compile(r"\d")
+# רצף של קבוצות אלפים מופרדות ברווח - מאוחד רק אם הקריאה חד-משמעית (_join_digit_groups)
+_DIGIT_GROUP_RE = re.compile(r"(?<![\d.,])(?<!\d )\d{1,3}(?: \d{3})+(?![\d.,]\d)(?! \d)")
+_PERCENT_RE = re.compile(r"(\d)\s*(?:" + "|".join(_PERCENT_WORDS) + r")\b")
+_HEBREW_RE = re.compile(r"[֐-׿]")
+_FOREIGN_DIGIT_RE = re.compile(r"[٠-٩۰-۹]")
+_TERMINAL_CHARS = frozenset(".!?…:\"')]")
+
+# המרת ספרות לא-לטיניות (ערבית-הודית, פרסית) לספרות רגילות
+_DIGITS_TABLE = str.maketrans(
+    "٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹",
+    "01234567890123456789",
+)
+
+
+def is_hallucination(text):
+    """בדוק אם הטקסט כולו ביטוי "מזויף" מוכר"""
+    return bool(_HALLUCINATION_RE.match(text))
+
+
+def normalize_numbers(text):
+    """נרמל מספרים: ספרות לטיניות, רווחים בקבוצות אלפים ואחוזים"""
+    if _FOREIGN_DIGIT_RE.search(text):
+        text = text.translate(_DIGITS_TABLE)
+    if not _DIGIT_RE.search(text):
+        return text
+    text = _DIGIT_GROUP_RE.sub(_join_digit_groups, text)
+    if "אחוז" in text:
+        text = _PERCENT_RE.sub(r"\1%", text)
+    return text
+
+
+def _join_digit_groups(match):
+    """אחד "1 200 000" ל-"1200000", אבל השאר רצף דו-משמעי כמו שהוא
+
+    הקבוצה האחרונה חייבת להיות 000, ואחרי קבוצת 000 מותרות רק עוד קבוצות 000 -
+    אחרת "5 100" או "100 000 200 000" יכולים להיות שני מספרים נפרדים.
+    """
+    groups = match.group().split(" ")[1:]
+    if groups[-1] != "000":
+        return match.group()
+    first_zero = groups.index("000")
+    if any(group != "000" for group in groups[first_zero:]):
+        return match.group()
+    return match.group().replace(" ", "")
+
+
+def restore_punctuation(text):
+    """תקן רווחים סביב סימני פיסוק (הנקודה בסוף משפט נקבעת ב-postprocess_segments)"""
+    text = _ELLIPSIS_RE.sub("…", text)
+    text = _REPEATED_PUNCT_RE.sub(r"\1", text)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    text = _MISSING_SPACE_AFTER_PUNCT_RE.sub(r"\1 ", text)
+    return text
+
+
+def end_sentence(text):
+    """הוסף נקודה אם הטקסט לא מסתיים כבר בסימן פיסוק"""
+    if text and text[-1] not in _TERMINAL_CHARS:
+        text += "."
+    return text
+
+
+def collapse_repeats(text):
+    """צמצם לולאות חזרה: מילה בודדת 6 פעמים ומעלה, או ביטוי 3 פעמים ומעלה"""
+    words = text.split()
+    # בדיקה זולה לפני הביטוי הרגולרי - בלי מילה חוזרת אין מה לצמצם
+    if len(set(words)) == len(words):
+        return text
+    text = _REPEATED_WORD_RE.sub(r"\1", text)
+    return _REPEATED_PHRASE_RE.sub(r"\1", text)
+
+
+@lru_cache(maxsize=65536)
+def clean_text(text):
+    """נקה טקסט של פלח בודד (עם זיכרון מטמון לפלחים חוזרים)"""
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if not text or is_hallucination(text):
+        return ""
+    text = collapse_repeats(text)
+    text = normalize_numbers(text)
+    return restore_punctuation(text)
+
+
+def postprocess_segments(segments):
+    """נקה רשימת פלחים והסר פלחים ריקים, "מזויפים" וכפולים צמודים
+
+    נקודה מתווספת רק בגבול משפט: בפלח האחרון או לפני הפסקה ארוכה,
+    כי Whisper חותך פלחים גם באמצע משפט.
+    """
+    cleaned = []
+    last_end = None
+    for segment in segments:
+        text = clean_text(segment["text"])
+        if not text:
+            continue
+        # אותו טקסט מיד אחרי הקודם - לולאת הזיה; אותו טקסט אחרי הפסקה - דיבור אמיתי
+        if (cleaned and text == cleaned[-1]["text"]
+                and segment["start"] - last_end < REPEAT_GAP):
+            last_end = segment["end"]
+            continue
+        segment["text"] = text
+        cleaned.append(segment)
+        last_end = segment["end"]
+
+    for current, following in zip(cleaned, cleaned[1:] + [None]):
+        if following is None or following["start"] - current["end"] >= SENTENCE_GAP:
+            current["text"] = end_sentence(current["text"])
+    return cleaned
+
+
+def postprocess_result(result):
+    """הרץ את שלב העיבוד על תוצאת Whisper - פעם אחת לפני כל הכותבים"""
+    result["segments"] = postprocess_segments(result["segments"])
+    result["text"] = " ".join(seg["text"] for seg in result["segments"])
+    return result
+
+
+def _wrap_line(line):
+    """הוסף סימן RLM כדי שפיסוק ומספרים יוצגו בצד הנכון בשורה עברית"""
+    if not _HEBREW_RE.search(line):
+        return line
+    return f"{RLM}{line}{RLM}"
+
+
+def _break_lines(words, width):
+    """שבור רשימת מילים לשורות שאף אחת מהן לא עוברת את הרוחב"""
+    lines = []
+    current = ""
+    for word in words:
+        candidate = f"{current} {word}" if current else word
+        if current and len(candidate) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    lines.append(current)
+    return lines
+
+
+@lru_cache(maxsize=65536)
+def subtitle_chunks(text, max_chars=MAX_LINE_CHARS, max_lines=MAX_LINES):
+    """שבור טקסט לכתוביות של עד max_lines שורות, כל שורה עד max_chars תווים
+
+    מחזיר tuple של (טקסט הכתובית, מספר תווים) - טקסט ארוך מתפצל לכמה כתוביות.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return ((_wrap_line(text), len(text)),)
+
+    # כוון לשורות באורך שווה בערך במקום למלא את הראשונה עד הסוף
+    words = text.split(" ")
+    lines_needed = -(-len(text) // max_chars)
+    lines = _break_lines(words, -(-len(text) // lines_needed))
+    if len(lines) > lines_needed:
+        lines = _break_lines(words, max_chars)
+
+    chunks = []
+    for i in range(0, len(lines), max_lines):
+        group = lines[i:i + max_lines]
+        chunks.append((
+            "\n".join(_wrap_line(line) for line in group),
+            sum(len(line) for line in group),
+        ))
+    return tuple(chunks)
+
+
+def subtitle_cues(segments):
+    """הפק כתוביות (התחלה, סוף, טקסט) מהפלחים; פלח ארוך מחולק לפי אורך הטקסט"""
+    for segment in segments:
+        chunks = subtitle_chunks(segment["text"])
+        start = segment["start"]
+        if len(chunks) == 1:
+            yield start, segment["end"], chunks[0][0]
+            continue
+
+        total = sum(length for _, length in chunks) or 1
+        duration = segment["end"] - segment["start"]
+        for chunk, length in chunks:
+            end = start + duration * length / total
+            yield start, end, chunk
+            start = end
@@ -9,6 +9,7 @@ import sys
 import os
 import argparse
 from pathlib import Path
+from hebrew_postprocess import postprocess_result, subtitle_cues
 
 def main():
     # הגדר פרמטרים
@@ -20,6 +21,8 @@ def main():
     parser.add_argument('--task', default='transcribe', choices=['transcribe', 'translate'],
                        help='משימה: transcribe או translate')
     parser.add_argument('--output', help='נתיב לקובץ פלט (אופציונלי)')
+    parser.add_argument('--no-cleanup', action='store_true',
+                       help='דלג על ניקוי הטקסט העברי (פיסוק, מספרים, הזיות)')
     
     args = parser.parse_args()
     
@@ -52,6 +55,10 @@ def main():
         print(f"❌ שגיאה בתמלול: {e}")
         sys.exit(1)
     
+    # ניקוי טקסט עברי
+    if not args.no_cleanup:
+        result = postprocess_result(result)
+    
     # הצג תוצאות
     print("\n" + "="*50)
     print("📝 תוצאת התמלול:")
@@ -78,10 +85,10 @@ def main():
         srt_file = f"{Path(args.audio_file).stem}_subtitles.srt"
         
         with open(srt_file, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(result["segments"], 1):
-                start = format_time(segment["start"])
-                end = format_time(segment["end"])
-                f.write(f"{i}\n{start} --> {end}\n{segment['text'].strip()}\n\n")
+            for i, (start, end, text) in enumerate(subtitle_cues(result["segments"]), 1):
+                start = format_time(start)
+                end = format_time(end)
+                f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
         
         print(f"✅ כתוביות נשמרו ל: {srt_file}")
 
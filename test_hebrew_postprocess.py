@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+בדיקות לעיבוד-ההמשך של תמלולים בעברית
+שימוש: python -m unittest test_hebrew_postprocess
+"""
+
+import unittest
+
+from hebrew_postprocess import (
+    MAX_LINE_CHARS,
+    RLM,
+    clean_text,
+    postprocess_result,
+    subtitle_cues,
+)
+
+
+def segment(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+
+class CleanTextTest(unittest.TestCase):
+    """כללי ניקוי לפלח בודד"""
+
+    def check(self, cases):
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(clean_text(text), expected)
+
+    def test_punctuation_spacing(self):
+        self.check([
+            ("שלום   לכולם ,מה שלומכם ?? אני כאן", "שלום לכולם, מה שלומכם? אני כאן"),
+            ("מה?? לא!!", "מה? לא!"),
+        ])
+
+    def test_ellipsis_is_kept(self):
+        self.check([
+            ("חכה רגע... אני חושב", "חכה רגע… אני חושב"),
+            ("ככה..", "ככה…"),
+        ])
+
+    def test_no_space_inserted_in_urls(self):
+        self.check([
+            ("היכנסו ל example.com?q=1,2", "היכנסו ל example.com?q=1,2"),
+        ])
+
+    def test_no_period_added_to_single_segment(self):
+        self.check([
+            ("אני רוצה לספר לכם", "אני רוצה לספר לכם"),
+        ])
+
+    def test_hallucinations_are_removed(self):
+        self.check([
+            ("תודה רבה שצפיתם!", ""),
+            ("Thanks for watching.", ""),
+            ("תודה רבה", "תודה רבה"),
+        ])
+
+    def test_emphatic_repeats_are_kept(self):
+        self.check([
+            ("לא לא לא, זה לא נכון", "לא לא לא, זה לא נכון"),
+            ("כן כן כן כן", "כן כן כן כן"),
+        ])
+
+    def test_repeat_loops_are_collapsed(self):
+        self.check([
+            ("כן כן כן כן כן כן כן כן", "כן"),
+            ("אני הולך הביתה אני הולך הביתה אני הולך הביתה", "אני הולך הביתה"),
+        ])
+
+    def test_number_grouping(self):
+        self.check([
+            ("עלה ל 1 000 000 שקל", "עלה ל 1000000 שקל"),
+            ("עלה ל 1 200 000 שקל", "עלה ל 1200000 שקל"),
+            ("כמעט 25 000 איש", "כמעט 25000 איש"),
+            ("בשנת 1948 100 אלף עולים הגיעו", "בשנת 1948 100 אלף עולים הגיעו"),
+            ("בין 5 100 ל 200", "בין 5 100 ל 200"),
+            ("בין 100 000 200 000", "בין 100 000 200 000"),
+            ("1,000,000 שקל", "1,000,000 שקל"),
+        ])
+
+    def test_percent_and_foreign_digits(self):
+        self.check([
+            ("עלה ב ٥٠ אחוז", "עלה ב 50%"),
+        ])
+
+
+class PostprocessResultTest(unittest.TestCase):
+    """כללים שתלויים בזמני הפלחים"""
+
+    def test_period_only_at_sentence_boundary(self):
+        result = postprocess_result({"text": "", "segments": [
+            segment(0.0, 2.0, "אני רוצה לספר לכם"),
+            segment(2.0, 4.0, "על הטיול שלנו לצפון"),
+            segment(8.0, 9.0, "זה היה מדהים"),
+            segment(9.2, 10.0, "באמת"),
+        ]})
+        self.assertEqual(
+            result["text"],
+            "אני רוצה לספר לכם על הטיול שלנו לצפון. זה היה מדהים באמת.",
+        )
+
+    def test_adjacent_duplicates_are_dropped(self):
+        result = postprocess_result({"text": "", "segments": [
+            segment(0.0, 1.0, "שלום לכולם"),
+            segment(1.0, 2.0, "שלום לכולם"),
+            segment(2.2, 3.0, "שלום לכולם"),
+        ]})
+        self.assertEqual(len(result["segments"]), 1)
+
+    def test_separated_duplicates_are_kept(self):
+        result = postprocess_result({"text": "", "segments": [
+            segment(9.0, 9.5, "כן"),
+            segment(12.0, 20.0, "מה אתה חושב על זה?"),
+            segment(30.0, 30.5, "כן"),
+        ]})
+        self.assertEqual([s["start"] for s in result["segments"]], [9.0, 12.0, 30.0])
+
+
+class SubtitleCuesTest(unittest.TestCase):
+    """שבירת שורות לכתוביות"""
+
+    def test_short_text_is_one_rtl_line(self):
+        cues = list(subtitle_cues([segment(0, 2, "שלום לכולם.")]))
+        self.assertEqual(cues, [(0, 2, f"{RLM}שלום לכולם.{RLM}")])
+
+    def test_long_text_respects_line_limit(self):
+        text = " ".join(f"מילה{i}" for i in range(25))
+        cues = list(subtitle_cues([segment(0, 10, text)]))
+        self.assertGreater(len(cues), 1)
+        self.assertEqual(cues[0][0], 0)
+        self.assertAlmostEqual(cues[-1][1], 10)
+        for _, _, cue in cues:
+            lines = cue.split("\n")
+            self.assertLessEqual(len(lines), 2)
+            for line in lines:
+                self.assertLessEqual(len(line.strip(RLM)), MAX_LINE_CHARS)
+
+
+if __name__ == "__main__":
+    unittest.main()